@@ -42,8 +42,9 @@ class Choosable(Translateable):
 
     @property
     def meta(self) -> Dict[str, any]:
-        meta_objects = ChoosableMeta.objects.filter(meta_choosable=self).order_by(
-            "meta_name"
+        # Sorted in Python to make use of prefetched meta objects (see prefetch_related("choosablemeta_choosable"))
+        meta_objects = sorted(
+            self.choosablemeta_choosable.all(), key=lambda m: m.meta_name
         )
         result = {}
 
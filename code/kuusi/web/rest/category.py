@@ -27,7 +27,7 @@ from rest_framework.mixins import ListModelMixin
 from rest_framework.response import Response
 from drf_spectacular.types import OpenApiTypes
 from drf_spectacular.utils import OpenApiParameter, extend_schema, OpenApiResponse
-from web.rest.helper import get_categories_and_filtered_pages
+from web.rest.helper import get_categories_and_filtered_pages, get_context_session
 from typing import Dict, Any
 
 class CategorySerializer(serializers.ModelSerializer):
@@ -36,7 +36,7 @@ class CategorySerializer(serializers.ModelSerializer):
         model = Category
         fields = '__all__'
     def get_name(self, obj: Category) -> str:
-        session: Session = Session.objects.filter(result_id=self.context['session_pk']).first()
+        session: Session = get_context_session(self.context)
         return obj.__("name", session.language_code)
     
     
@@ -68,6 +68,7 @@ class CategoryViewSet(ListModelMixin, GenericViewSet):
         )
 
         serializer.context["session_pk"] = kwargs["session_pk"]
+        serializer.context["session"] = session
         return Response(serializer.data)
 
     
\ No newline at end of file
@@ -22,14 +22,20 @@ from rest_framework import serializers
 from drf_spectacular.types import OpenApiTypes
 from drf_spectacular.utils import OpenApiParameter, extend_schema, OpenApiResponse
 from rest_framework import status
-from kuusi.settings import LANGUAGE_CODES
+from kuusi.settings import LANGUAGE_CODES, DEFAULT_LANGUAGE_CODE
 from rest_framework.response import Response
 from rest_framework.viewsets import GenericViewSet
 from rest_framework.mixins import ListModelMixin
+from rest_framework.renderers import BrowsableAPIRenderer
+from web.rest.renderer import ORJSONRenderer
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import conditional_page
 
 from typing import Dict, Any
 
 CHOOSABLE_SERIALIZER_BASE_FIELDS = ('id', 'name', 'description', 'bg_color', 'fg_color', 'meta')
+# The columns to load for the serializer, catalogue_id is required to resolve the translated description
+CHOOSABLE_SERIALIZER_QUERY_FIELDS = ('id', 'catalogue_id', 'name', 'bg_color', 'fg_color')
 
 class ChoosableSerializer(serializers.ModelSerializer):
     description = serializers.SerializerMethodField()
@@ -38,16 +44,20 @@ class ChoosableSerializer(serializers.ModelSerializer):
         model = Choosable
         fields = CHOOSABLE_SERIALIZER_BASE_FIELDS
     def get_description(self, obj: Choosable) -> str:
-        return obj.__("description",   "en") # self.context['request'].query_params["lang"]) # FIXME: Decide how to inject this. Maybe get rid of this endpoint...
+        # Translations are served from the in-memory catalogue, so no query is needed per choosable
+        return obj.__("description", self.context.get("language_code", DEFAULT_LANGUAGE_CODE))
     def get_meta(self, obj: Choosable) -> Dict[str, Any]:
-        meta_values = obj.meta
-        for key, value in meta_values.items():
-            meta_values[key] = value.meta_value
-        return meta_values
+        return {key: value.meta_value for key, value in obj.meta.items()}
     
 class ChoosableViewSet(ListModelMixin, GenericViewSet):
-    queryset = Choosable.objects.all()
+    queryset = Choosable.objects.only(*CHOOSABLE_SERIALIZER_QUERY_FIELDS).prefetch_related("choosablemeta_choosable")
     serializer_class = ChoosableSerializer
+    renderer_classes = [ORJSONRenderer, BrowsableAPIRenderer]
+
+    def get_serializer_context(self) -> Dict[str, Any]:
+        context = super().get_serializer_context()
+        context["language_code"] = self.request.query_params.get("lang")
+        return context
 
     @extend_schema(
         parameters=[
@@ -58,6 +68,8 @@ class ChoosableViewSet(ListModelMixin, GenericViewSet):
             status.HTTP_412_PRECONDITION_FAILED: OpenApiResponse(description='Invalid language'),
         }
     )
+    # Saves bandwidth only: the list is still serialized to compute the ETag, but an unchanged list is answered without a body.
+    @method_decorator(conditional_page)
     def list(self, request,  *args, **kwargs):
         lang = request.query_params.get('lang')
         if lang not in LANGUAGE_CODES:
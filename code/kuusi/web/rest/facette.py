@@ -18,6 +18,7 @@ along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 
 from web.models import Facette, Session
+from web.rest.helper import get_context_session
 from rest_framework import serializers
 from drf_spectacular.utils import  extend_schema, OpenApiResponse
 from drf_spectacular.types import OpenApiTypes
@@ -37,7 +38,7 @@ class FacetteSerializer(serializers.ModelSerializer):
         model = Facette
         fields = ('id', 'topic', 'selectable_description')
     def get_selectable_description(self, obj: Facette) -> str:
-        session: Session = Session.objects.filter(result_id=self.context['session_pk']).first()
+        session: Session = get_context_session(self.context)
         return obj.__("selectable_description",  session.language_code)
     
     
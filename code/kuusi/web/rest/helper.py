@@ -16,9 +16,20 @@ You should have received a copy of the GNU Affero General Public License
 along with this program.  If not, see <http://www.gnu.org/licenses/>.
 """
 
-from typing import List, Tuple
+from __future__ import annotations
+from typing import List, Tuple, Dict, Any
 from web.models import Page, Session, Category
 
+def get_context_session(context: Dict[str, Any]) -> Session | None:
+    """
+    Get the session referenced by the session_pk of a serializer context.
+
+    The session is kept in the context, so following lookups within the same request don't query it again.
+    """
+    if "session" not in context:
+        context["session"] = Session.objects.filter(result_id=context["session_pk"]).first()
+    return context["session"]
+
 def get_page_route(page: Page) -> List[Page]: 
     """
     Get a next page and all available pages from the given page as a start point
@@ -21,6 +21,7 @@ from django.shortcuts import get_object_or_404
 from web.models import Page, Session, Widget, HTMLWidget, FacetteRadioSelectionWidget, FacetteSelectionWidget, NavigationWidget, ResultListWidget, ResultShareWidget, Facette, SessionVersionWidget, SessionVersion
 from web.rest.facette import FacetteSerializer
 from web.rest.session import SessionVersionSerializer
+from web.rest.helper import get_context_session
 from rest_framework import serializers
 from drf_spectacular.utils import extend_schema, OpenApiResponse
 from rest_framework import status
@@ -45,7 +46,7 @@ class PageSerializer(serializers.ModelSerializer):
         fields = '__all__'
 
     def get_text(self, obj: Page) -> str:
-        session: Session = Session.objects.filter(result_id=self.context['session_pk']).first()
+        session: Session = get_context_session(self.context)
         return obj.__("text", session.language_code)
     
     
@@ -95,5 +96,6 @@ class PageViewSet(GenericViewSet, ListModelMixin):
         )
 
         serializer.context["session_pk"] = kwargs["session_pk"]
+        serializer.context["session"] = session
         return Response(serializer.data)
 
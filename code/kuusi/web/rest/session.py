@@ -24,6 +24,7 @@ from drf_spectacular.utils import OpenApiParameter, extend_schema, OpenApiRespon
 from rest_framework import status
 from kuusi.settings import LANGUAGE_CODES, DEFAULT_SESSION_META, FRONTEND_URL, RTL_LANGUAGES
 from web.models import TRANSLATIONS
+from web.rest.helper import get_context_session
 from rest_framework.response import Response
 from rest_framework.viewsets import ViewSet
 
@@ -63,7 +64,7 @@ class SessionVersionSerializer(serializers.ModelSerializer):
         fields = '__all__' 
 
     def get_text(self, obj: SessionVersion) -> str:
-        session: Session = Session.objects.filter(result_id=self.context['session_pk']).first()
+        session: Session = get_context_session(self.context)
         return obj.__("version_name", session.language_code)
 
 
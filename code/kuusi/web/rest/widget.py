@@ -16,7 +16,7 @@ You should have received a copy of the GNU Affero General Public License
 along with this program.  If not, see <http://www.gnu.org/licenses/>.
 """
 
-from collections import OrderedDict
+from collections import defaultdict
 from web.models import (
     Page,
     Session,
@@ -36,7 +36,8 @@ from web.models import (
 )
 from web.rest.facette import FacetteSerializer
 from web.rest.session import SessionVersionSerializer
-from web.rest.choosable import ChoosableSerializer, CHOOSABLE_SERIALIZER_BASE_FIELDS
+from web.rest.choosable import ChoosableSerializer, CHOOSABLE_SERIALIZER_BASE_FIELDS, CHOOSABLE_SERIALIZER_QUERY_FIELDS
+from web.rest.helper import get_context_session
 from rest_framework import serializers
 from drf_spectacular.utils import extend_schema, OpenApiResponse
 from drf_spectacular.types import OpenApiTypes
@@ -45,31 +46,39 @@ from rest_framework import status
 from kuusi.settings import LANGUAGE_CODES, WEIGHT_MAP
 from rest_framework.viewsets import GenericViewSet
 from rest_framework.mixins import ListModelMixin
+from rest_framework.renderers import BrowsableAPIRenderer
+from web.rest.renderer import ORJSONRenderer
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import conditional_page
 from rest_framework.response import Response
 
 from drf_spectacular.utils import extend_schema_field, PolymorphicProxySerializer
 
 from rest_polymorphic.serializers import PolymorphicSerializer
 
-from typing import Dict, Any, List
+from django.db.models import prefetch_related_objects, Count
+
+from typing import Dict, Any, List, Tuple, Callable
+from functools import cached_property
+from operator import attrgetter
 
 WIDGET_SERIALIZER_BASE_FIELDS = ("id", "row", "col", "width", "pages", "widget_type",)
 
+# Amount of choosables fetched at once for the result list
+CHOOSABLE_CHUNK_SIZE = 500
+
 
 # TODO: For all serializers
 # MOve the render features into the serializers
 # E. g. selections needed facettes, question texts, hints ....
 class WidgetSerializer(serializers.ModelSerializer):
-    widget_type = serializers.SerializerMethodField()
+    widget_type = serializers.ReadOnlyField()
     class Meta:
         model = Widget
         fields = WIDGET_SERIALIZER_BASE_FIELDS
-    def get_widget_type(self, obj):
-        return obj.widget_type
 
 
 class HTMLWidgetSerializer(WidgetSerializer):
-    widget_type = serializers.SerializerMethodField()
     class Meta:
         model = HTMLWidget
         fields = WIDGET_SERIALIZER_BASE_FIELDS + ("template",)
@@ -80,10 +89,9 @@ class WithFacetteWidgetSerializer(WidgetSerializer):
 
     @extend_schema_field(field=FacetteSerializer(many=True))
     def get_facettes(self, obj: FacetteSelectionWidget) -> List[Facette]:
-        facettes: Facette = Facette.objects.filter(topic=obj.topic)
+        facettes: List[Facette] = self.context["facettes_by_topic"].get(obj.topic, [])
 
-        serializer = FacetteSerializer(facettes, many=True)
-        serializer.context["session_pk"] = self.context["session_pk"]
+        serializer = FacetteSerializer(facettes, many=True, context=self.context)
         return serializer.data
 
 
@@ -115,9 +123,7 @@ class SessionVersionWidgetSerializer(WidgetSerializer):
 
     @extend_schema_field(field=SessionVersionSerializer(many=True))
     def get_versions(self, obj: SessionVersionWidget) -> List[SessionVersion]:
-        serializer = SessionVersionSerializer(SessionVersion.objects.all(), many=True)
-
-        serializer.context["session_pk"] = self.context["session_pk"]
+        serializer = SessionVersionSerializer(self.context["versions"], many=True, context=self.context)
         return serializer.data
 
 
@@ -143,11 +149,25 @@ class RankedChoosableSerializer(ChoosableSerializer):
         fields = CHOOSABLE_SERIALIZER_BASE_FIELDS + ("rank",)
 
     def get_rank(self, obj: Choosable) -> int:
-        return self.context["ranking"][obj.pk] if obj.pk in self.context["ranking"] else 9999999999
-    
-    def get_description(self, obj:Choosable) -> str:
-        session = Session.objects.filter(result_id=self.context["session_pk"]).first()
-        return obj.__("description", session.language_code)
+        # The score does not depend on the choosable, so all of them share the score of the session
+        return self.context["score"]
+
+    @cached_property
+    def row_getters(self) -> List[Tuple[str, Callable[[Choosable], Any]]]:
+        """
+        Resolve once how each field of Meta.fields is read from a choosable.
+        """
+        getters = []
+        for field_name, field in self.fields.items():
+            if isinstance(field, serializers.SerializerMethodField):
+                getters.append((field_name, getattr(self, field.method_name)))
+            else:
+                getters.append((field_name, attrgetter(field.source)))
+        return getters
+
+    def to_representation(self, instance: Choosable) -> Dict[str, Any]:
+        # The result list contains every choosable, so the row is built from the resolved getters instead of walking the bound fields.
+        return {field_name: getter(instance) for field_name, getter in self.row_getters}
 
 
 class ResultListWidgetSerializer(WidgetSerializer):
@@ -159,56 +179,65 @@ class ResultListWidgetSerializer(WidgetSerializer):
 
     @extend_schema_field(field=RankedChoosableSerializer(many=True))
     def get_choosables(self, obj: ResultListWidget) -> List[Choosable]:
-        session = Session.objects.filter(result_id=self.context["session_pk"]).first()
-        choosables = Choosable.objects.all()
-        selections = FacetteSelection.objects.filter(session=session)
-        ranking = {}
-        for choosable in choosables:
-            scores_by_type = {}
-            for key in FacetteAssignment.AssignmentType.choices:
-                identifier, _ = key
-                scores_by_type[identifier] = 0
-
-            for selection in selections:
-                facette = selection.facette
-                selection_weight_key = selection.weight
-                selection_weight_value = WEIGHT_MAP[selection_weight_key]
-                assignments = FacetteAssignment.objects.filter(facettes__in=[facette])
-
-                for assignment in assignments:
-                    weighted_score = 1 * selection_weight_value
-                    scores_by_type[assignment.assignment_type] += weighted_score
-            
-            
-            ranking[choosable.pk]  = FacetteAssignment.AssignmentType.get_score(scores_by_type)
+        session = get_context_session(self.context)
+        choosables = Choosable.objects.only(*CHOOSABLE_SERIALIZER_QUERY_FIELDS).prefetch_related(
+            "choosablemeta_choosable"
+        )
 
+        # The scores are not depending on the choosable, so they are aggregated once for all of them.
+        # Every assignment of a selected facette adds the weight of the selection to the score of its type.
+        # The database counts these per type and weight, WEIGHT_MAP is applied here to keep the integer scores of integer weights.
+        assignment_counts = (
+            FacetteSelection.objects.filter(session=session, facette__facetteassignment__isnull=False)
+            .values("facette__facetteassignment__assignment_type", "weight")
+            .annotate(amount=Count("pk"))
+            .order_by()
+        )
+        scores_by_type = defaultdict(int)
+        for row in assignment_counts:
+            scores_by_type[row["facette__facetteassignment__assignment_type"]] += WEIGHT_MAP[row["weight"]] * row["amount"]
 
+        # Without any selections, all choosables keep the neutral score.
+        score = FacetteAssignment.AssignmentType.get_score(scores_by_type) if scores_by_type else 0
+        # The choosables are fetched in chunks and serialized right away, so the model instances don't need to be kept.
         serializer = RankedChoosableSerializer(
-            choosables,
-            many=True
+            choosables.iterator(chunk_size=CHOOSABLE_CHUNK_SIZE),
+            many=True,
+            context={
+                "session_pk": self.context["session_pk"],
+                "session": session,
+                "score": score,
+                "language_code": session.language_code,
+            },
         )
-        serializer.context["session_pk"] = self.context["session_pk"]
-        serializer.context["ranking"] = ranking
         return serializer.data
 
 
 
+# The serializers are resolved by the exact widget class, so specialized widgets need their own entry.
+WIDGET_SERIALIZERS = {
+    HTMLWidget: HTMLWidgetSerializer,
+    NavigationWidget: NavigationWidgetSerializer,
+    SessionVersionWidget: SessionVersionWidgetSerializer,
+    FacetteRadioSelectionWidget: FacetteRadioSelectionWidgetSerializer,
+    FacetteSelectionWidget: FacetteSelectionWidgetSerializer,
+    ResultListWidget: ResultListWidgetSerializer,
+    ResultShareWidget: ResultShareWidgetSerializer
+}
+
+
 class WidgetViewSet(ListModelMixin, GenericViewSet):
     queryset = Page.objects.all()
+    renderer_classes = [ORJSONRenderer, BrowsableAPIRenderer]
     @extend_schema(
         responses={
             status.HTTP_200_OK: OpenApiResponse(
                 response=PolymorphicProxySerializer(
-                    serializers=[
-                        HTMLWidgetSerializer,
-                        NavigationWidgetSerializer,
-                        SessionVersionWidgetSerializer,
-                        FacetteRadioSelectionWidgetSerializer,
-                        FacetteSelectionWidgetSerializer,
-                        ResultListWidgetSerializer,
-                        ResultShareWidgetSerializer
-                        
-                    ],
+                    # The widget_type equals the widget class name
+                    serializers={
+                        widget_class.__name__: serializer_class
+                        for widget_class, serializer_class in WIDGET_SERIALIZERS.items()
+                    },
                     component_name="MetaWidget",
                     resource_type_field_name="widget_type",
                     many=True,
@@ -233,35 +262,53 @@ class WidgetViewSet(ListModelMixin, GenericViewSet):
             ),
         ],
     )
+    # The widgets depend on the session and on the catalogue data, which has no modification timestamps.
+    # The ETag is therefore hashed from the rendered widgets, which only spares the transfer of an unchanged body.
+    @method_decorator(conditional_page)
     def list(self, request, *args, **kwargs):
         page_pk = kwargs.get("page_pk")
         obj: Page = None
         if page_pk:
-            obj = Page.objects.filter(pk=page_pk).first()
-        result = []
-        # IMPORTANT
-        # The serializers are ordered, specialized before generic
-
-        serializers = OrderedDict(
-            {
-                HTMLWidget: HTMLWidgetSerializer,
-                NavigationWidget: NavigationWidgetSerializer,
-                SessionVersionWidget: SessionVersionWidgetSerializer,
-                FacetteRadioSelectionWidget: FacetteRadioSelectionWidgetSerializer,
-                FacetteSelectionWidget: FacetteSelectionWidgetSerializer,
-                ResultListWidget: ResultListWidgetSerializer,
-                ResultShareWidget: ResultShareWidgetSerializer
-            }
-        )
+            # The widget_list only requires the primary key of the page
+            obj = Page.objects.only("pk").filter(pk=page_pk).first()
+        session = Session.objects.filter(result_id=kwargs["session_pk"]).first()
+        widgets = obj.widget_list
+        # All widgets share the pages relation of the Widget base model, so it can be fetched at once.
+        prefetch_related_objects(widgets, "pages")
+
+        # Serialize the widgets grouped by their type, the index keeps the order of the widget_list.
+        widgets_by_type = defaultdict(list)
         widget: Widget
-        for widget in obj.widget_list:
-            for key, value in serializers.items():
-                if isinstance(widget, key):
-                    selected_serializer = serializers[type(widget)]
-                    results = selected_serializer(widget)
-                    results.context["session_pk"] = kwargs["session_pk"]
-                    result.append(results.data)
-                    break
-
-
-        return Response(result)
+        for index, widget in enumerate(widgets):
+            widgets_by_type[type(widget)].append((index, widget))
+
+        # The facettes of all topics on this page are fetched at once for the WithFacetteWidgetSerializers
+        facettes_by_topic = defaultdict(list)
+        topics = [widget.topic for widget in widgets if hasattr(widget, "topic")]
+        facette: Facette
+        for facette in Facette.objects.filter(topic__in=topics):
+            facettes_by_topic[facette.topic].append(facette)
+
+        # The versions are the same for every SessionVersionWidget, so they are only fetched once
+        versions = list(SessionVersion.objects.all()) if SessionVersionWidget in widgets_by_type else []
+
+        result = [None] * len(widgets)
+        for widget_type, indexed_widgets in widgets_by_type.items():
+            selected_serializer = WIDGET_SERIALIZERS.get(widget_type)
+            if not selected_serializer:
+                continue
+            indexes, typed_widgets = zip(*indexed_widgets)
+            results = selected_serializer(
+                typed_widgets,
+                many=True,
+                context={
+                    "session_pk": kwargs["session_pk"],
+                    "session": session,
+                    "facettes_by_topic": facettes_by_topic,
+                    "versions": versions,
+                },
+            )
+            for index, data in zip(indexes, results.data):
+                result[index] = data
+
+        return Response([data for data in result if data is not None])